@@ -5,29 +5,112 @@ CRUD = Create, Read, Update, Delete
 Beginner notes:
 - These functions talk to the database
 - main.py calls these to keep code clean
+- API functions are `async` (use them with `await` and an AsyncSession);
+  the export helpers (get_items_version, get_items_for_export) are plain sync
 """
 
 from __future__ import annotations
 
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from decimal import Decimal
+from typing import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import select, func, insert, update, delete
+from sqlalchemy.exc import SQLAlchemyError
 
 from . import models, schemas
 
 
-def get_items(db: Session) -> list[models.Item]:
-    # SELECT * FROM items ORDER BY id DESC
-    stmt = select(models.Item).order_by(models.Item.id.desc())
-    return list(db.execute(stmt).scalars().all())
+def get_items_version(db: Session) -> int | None:
+    """
+    Cheap "did the items table change?" check, used as the export cache key / ETag:
+    SELECT version FROM items_version WHERE id = 1
+
+    The database bumps this number on every INSERT/UPDATE/DELETE on items
+    (triggers in models.py), whoever runs it, so we never bump it ourselves.
+
+    Returns None if the table or its row is missing (see models.ensure_items_version);
+    callers then simply don't cache.
+    """
+    stmt = select(models.ItemsVersion.version).where(models.ItemsVersion.id == 1)
+    try:
+        return db.execute(stmt).scalar_one_or_none()
+    except SQLAlchemyError:
+        db.rollback()  # e.g. "no such table"; leave the session usable
+        return None
+
+
+ITEM_LOAD_OPTIONS = (raiseload("*"),)
+
+
+def items_query():
+    """
+    Base SELECT for reading Item objects. All ORM list reads start here
+    (single-item reads use db.get(..., options=ITEM_LOAD_OPTIONS), same rule).
+
+    raiseload("*") makes any lazy relationship load raise an error instead of
+    silently running one extra query per row (the "N+1" problem).
+    If a route needs related data, load it explicitly, e.g.:
+        items_query().options(selectinload(models.Item.supplier))
+    """
+    return select(models.Item).options(*ITEM_LOAD_OPTIONS)
+
+
+async def get_items(db: AsyncSession, limit: int | None = None) -> Sequence[models.Item]:
+    # SELECT * FROM items ORDER BY id DESC [LIMIT n]
+    stmt = items_query().order_by(models.Item.id.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return (await db.execute(stmt)).scalars().all()  # .all() already returns a list
 
 
-def get_item(db: Session, item_id: int) -> models.Item | None:
-    # SELECT * FROM items WHERE id = item_id
-    stmt = select(models.Item).where(models.Item.id == item_id)
-    return db.execute(stmt).scalars().first()
+async def get_item_stats(db: AsyncSession) -> tuple[int, int, Decimal]:
+    """
+    Dashboard numbers in ONE query:
+    SELECT COUNT(id), SUM(qty), SUM(qty * price) FROM items
+
+    The database does the math, so we never load every row just to add them up.
+    total_value stays a Decimal (price is a Numeric money column), no float rounding.
+    """
+    stmt = select(
+        func.count(models.Item.id),
+        func.coalesce(func.sum(models.Item.qty), 0),
+        func.coalesce(func.sum(models.Item.qty * models.Item.price), 0),
+    )
+    total_rows, total_qty, total_value = (await db.execute(stmt)).one()
+    return int(total_rows), int(total_qty), Decimal(total_value)
+
+
+async def get_item(db: AsyncSession, item_id: int) -> models.Item | None:
+    # Primary-key lookup: checks the session's identity map first,
+    # otherwise SELECT * FROM items WHERE id = item_id (statement is cached)
+    return await db.get(models.Item, item_id, options=ITEM_LOAD_OPTIONS)
+
+
+def get_items_for_export(db: Session) -> list[tuple]:
+    """
+    All rows for Excel/PDF exports, as plain tuples: (id, name, sku, qty, price, value).
+
+    We select only the columns we need, not full ORM objects.
+    value = qty * price is computed by the database (NULL when price is NULL).
+    The whole list is loaded at once: it is sent to a worker process in one piece.
+    """
+    stmt = (
+        select(
+            models.Item.id,
+            models.Item.name,
+            models.Item.sku,
+            models.Item.qty,
+            models.Item.price,
+            (models.Item.qty * models.Item.price).label("value"),
+        )
+        .order_by(models.Item.id.desc())
+    )
+    return [tuple(row) for row in db.execute(stmt)]
 
 
-def create_item(db: Session, item: schemas.ItemCreate) -> models.Item:
+async def create_item(db: AsyncSession, item: schemas.ItemCreate) -> models.Item:
     new_item = models.Item(
         name=item.name.strip(),
         sku=item.sku.strip(),
@@ -35,38 +118,74 @@ def create_item(db: Session, item: schemas.ItemCreate) -> models.Item:
         price=item.price,
     )
     db.add(new_item)
-    db.commit()       # save changes
-    db.refresh(new_item)  # reload from DB (gets the ID)
+    await db.commit()       # save changes
+    await db.refresh(new_item)  # reload from DB (gets the ID)
     return new_item
 
 
-def update_item(db: Session, item_id: int, patch: schemas.ItemUpdate) -> models.Item | None:
-    obj = get_item(db, item_id)
-    if not obj:
-        return None
-
+async def create_items_bulk(db: AsyncSession, items: list[schemas.ItemCreate]) -> int:
+    """
+    Insert many items with ONE executemany and ONE commit.
+    Much faster than calling create_item() in a loop (one commit per row).
+    Returns how many rows were inserted.
+    """
+    if not items:
+        return 0
+
+    rows = [
+        {
+            "name": it.name.strip(),
+            "sku": it.sku.strip(),
+            "qty": it.qty,
+            "price": it.price,
+        }
+        for it in items
+    ]
+    await db.execute(insert(models.Item), rows)
+    await db.commit()
+    return len(rows)
+
+
+async def update_item(db: AsyncSession, item_id: int, patch: schemas.ItemUpdate) -> models.Item | None:
+    """
+    UPDATE items SET ... WHERE id = item_id RETURNING *
+
+    One round-trip: no SELECT first. Returns None if the item does not exist.
+    """
     # Only update fields that user sent
+    values = {}
     if patch.name is not None:
-        obj.name = patch.name.strip()
+        values["name"] = patch.name.strip()
     if patch.sku is not None:
-        obj.sku = patch.sku.strip()
+        values["sku"] = patch.sku.strip()
     if patch.qty is not None:
-        obj.qty = patch.qty
+        values["qty"] = patch.qty
     if patch.price is not None:
-        obj.price = patch.price
-
-    db.commit()
-    db.refresh(obj)
+        values["price"] = patch.price
+
+    if not values:
+        return await get_item(db, item_id)
+
+    stmt = (
+        update(models.Item)
+        .where(models.Item.id == item_id)
+        .values(**values)
+        .returning(models.Item)
+        # Fresh per-request session: nothing in it to keep in sync, skip that work
+        .execution_options(synchronize_session=False)
+    )
+    obj = (await db.execute(stmt)).scalars().first()
+    await db.commit()
     return obj
 
 
-def delete_item(db: Session, item_id: int) -> bool:
-    obj = get_item(db, item_id)
-    if not obj:
-        return False
-
-    db.delete(obj)
-    db.commit()
-    return True
-
-
+async def delete_item(db: AsyncSession, item_id: int) -> bool:
+    # DELETE FROM items WHERE id = item_id (rowcount tells us if it existed)
+    stmt = (
+        delete(models.Item)
+        .where(models.Item.id == item_id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount > 0
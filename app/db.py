@@ -6,10 +6,27 @@ Beginner notes:
 - engine: the "connection" to the database
 - SessionLocal: creates a DB session for each request
 - Base: parent class for our models (tables)
+- get_db: FastAPI dependency that gives each request its own session
+
+Two flavours of the same database:
+- async_engine / AsyncSessionLocal / get_async_db: used by the `async def` API
+  routes, so waiting on the DB does not block a thread
+- engine / SessionLocal / get_db: plain (sync) version, used by the exports
+  and for creating tables
 
 We support:
 1) SQLite (simple local file) for development
 2) DATABASE_URL env var for production (e.g., Postgres on hosting)
+   (Postgres uses the psycopg driver, version 3, for both the sync and the async engine)
+
+Connections are pooled: a request borrows an open connection and gives it
+back, instead of opening a new one every time.
+On server databases each engine has its own pool, in EVERY server process:
+- async engine: DB_POOL_SIZE (default 20) + DB_MAX_OVERFLOW (default 10) connections
+- sync engine (only exports, version checks, create_all): DB_SYNC_POOL_SIZE
+  (default 2) + DB_SYNC_MAX_OVERFLOW (default 3) connections
+So one process may open up to 35 connections; multiply by the number of
+workers and keep it under your database's connection limit.
 """
 
 from __future__ import annotations
@@ -17,7 +34,8 @@ from __future__ import annotations
 import os
 from pathlib import Path
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # ✅ Where to store SQLite file (project root /inventory.db)
@@ -27,15 +45,93 @@ SQLITE_PATH = PROJECT_ROOT / "inventory.db"
 # ✅ If hosting provides DATABASE_URL, use it. Otherwise use SQLite.
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{SQLITE_PATH.as_posix()}")
 
-# ✅ SQLite needs this special flag because it is file-based
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+_url = make_url(DATABASE_URL)
+# ✅ Postgres without an explicit driver ("postgresql://" or the older "postgres://"):
+# use psycopg 3. One driver does sync AND async, and it understands the usual
+# hosting options like ?sslmode=require (asyncpg would reject those).
+if _url.drivername in ("postgres", "postgresql"):
+    _url = _url.set(drivername="postgresql+psycopg")
+SYNC_DATABASE_URL = _url
+
+# ✅ Same database, async driver: sqlite -> sqlite+aiosqlite, postgresql -> postgresql+psycopg
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+psycopg"}
+ASYNC_DATABASE_URL = _url.set(drivername=ASYNC_DRIVERS.get(_url.get_backend_name(), _url.drivername))
+
+if IS_SQLITE:
+    # ✅ SQLite needs this special flag because it is file-based.
+    # SQLAlchemy keeps a small pool of open file connections for us.
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+else:
+    # ✅ Server databases (Postgres...): size each pool for the requests it serves
+    pool_options = dict(
+        pool_pre_ping=True,   # drop dead connections before using them
+        pool_recycle=3600,    # reconnect after 1 hour (hosting DBs close idle ones)
+    )
+    # Sync sessions are only used by exports (a version check, a row read on a cache miss)
+    engine = create_engine(
+        SYNC_DATABASE_URL,
+        pool_size=int(os.getenv("DB_SYNC_POOL_SIZE", "2")),
+        max_overflow=int(os.getenv("DB_SYNC_MAX_OVERFLOW", "3")),
+        **pool_options,
+    )
+    # All API routes and the dashboard
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        **pool_options,
+    )
+
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _connection_record):
+        """
+        Runs once per new SQLite connection.
+        - WAL: readers don't wait for writers
+        - synchronous=NORMAL: one less fsync per commit (safe with WAL)
+        - temp_store=MEMORY: temp tables/indexes stay in RAM
+        - mmap_size=256 MB: read the DB file through memory mapping (fewer read() calls)
+        - cache_size=-64000: page cache of ~64 MB per connection (negative = KiB)
+        """
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.execute("PRAGMA mmap_size=268435456")
+        cur.execute("PRAGMA cache_size=-64000")
+        cur.close()
 
 # ✅ Session factory (each request gets its own session)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ✅ Async session factory.
+# expire_on_commit=False: objects stay readable after commit (no hidden reload query,
+# which async code could not do lazily anyway).
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # ✅ Base class for all tables
 Base = declarative_base()
+
+
+def get_db():
+    """
+    Creates a DB session per request, then closes it.
+    Why?
+    - If you don't close sessions, connections pile up and your app gets slow/broken.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """Async version of get_db, for `async def` routes."""
+    async with AsyncSessionLocal() as db:
+        yield db
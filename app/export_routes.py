@@ -3,83 +3,195 @@
 Export routes
 
 Beginner notes:
-- /reports shows a page with download buttons
-- /export/items.xlsx downloads Excel
-- /export/items.pdf downloads PDF (A4)
+- /reports shows a page with download buttons (static, so browsers may cache it)
+- /export/items.xlsx downloads Excel (also at /exports/items.xlsx)
+- /export/items.pdf downloads PDF (A4) (also at /exports/items.pdf)
+- Built files are cached in memory until the items table changes (the database
+  keeps a version number for that, see models.ItemsVersion), and carry an ETag
+  so a browser that already has the current file gets a tiny 304 instead
+- Building runs in separate worker processes (openpyxl/reportlab are pure
+  Python, so in our own process they would hold the GIL and slow every request).
+  The app's lifespan starts them (start_export_workers) and stops them
+  (stop_export_workers); if a worker dies, the pool is replaced on the next export.
+
+Warning: the workers are started with "spawn", which re-imports the main script
+in every worker. A script that imports this app and runs exports (tests, tools)
+must put its code under `if __name__ == "__main__":`, otherwise the workers
+crash on startup and every export fails with BrokenProcessPool.
 """
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import StreamingResponse, HTMLResponse
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import HTMLResponse
+from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
-from .db import SessionLocal
+from .db import get_db
 from . import crud
-from .export_utils import items_to_xlsx_bytes, items_to_pdf_bytes, make_export_filename
+from .export_utils import (
+    PDF_MEDIA_TYPE,
+    XLSX_MEDIA_TYPE,
+    build_export_bytes,
+    content_disposition,
+    make_export_filename,
+)
 
 router = APIRouter(tags=["Exports"])
 
+templates = Jinja2Templates(directory="app/templates")
+
+# The reports page has no dynamic data, so we render it ONCE at import time
+REPORTS_HTML = templates.get_template("reports.html").render()
+REPORTS_ETAG = '"' + hashlib.md5(REPORTS_HTML.encode()).hexdigest() + '"'
+REPORTS_CACHE_HEADERS = {"Cache-Control": "public, max-age=300", "ETag": REPORTS_ETAG}
+
+# Worker processes for building export files (created in the app's lifespan).
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", str(os.cpu_count() or 1)))
+_export_executor: ProcessPoolExecutor | None = None
+_export_executor_lock = threading.Lock()
+
+
+def _new_export_executor() -> ProcessPoolExecutor:
+    # "spawn" starts clean processes; forking a server that runs threads is unsafe.
+    # The processes themselves only start on the first export.
+    return ProcessPoolExecutor(max_workers=EXPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
 
-def get_db():
-    """Same idea as in main.py: open DB session, close after request."""
-    db = SessionLocal()
+def start_export_workers() -> None:
+    """Called once when the app starts (see lifespan in main.py)."""
+    global _export_executor
+    with _export_executor_lock:
+        if _export_executor is None:
+            _export_executor = _new_export_executor()
+
+
+def stop_export_workers() -> None:
+    """Called when the app stops: cancel queued builds and end the worker processes."""
+    global _export_executor
+    with _export_executor_lock:
+        executor, _export_executor = _export_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _build_in_worker(kind: str, rows: list[tuple]) -> bytes:
+    """
+    Run build_export_bytes in a worker process.
+    If a worker died (e.g. killed for using too much memory), the whole pool is
+    "broken" and refuses new work: replace it with a fresh pool and try once more.
+    """
+    global _export_executor
+    executor = _export_executor
+    if executor is None:
+        raise RuntimeError("Export workers are not running (start the app with its lifespan)")
     try:
-        yield db
-    finally:
+        return executor.submit(build_export_bytes, kind, rows).result()
+    except BrokenProcessPool:
+        with _export_executor_lock:
+            # Another request may have replaced it already
+            if _export_executor is executor:
+                _export_executor = _new_export_executor()
+            executor = _export_executor
+        if executor is None:  # app is shutting down
+            raise
+        return executor.submit(build_export_bytes, kind, rows).result()
+
+
+# Newest built file per kind: {"xlsx": (version, bytes), "pdf": (version, bytes)}
+_export_cache: dict[str, tuple[int, bytes]] = {}
+# One lock per kind: if 10 people click "Excel" right after an edit,
+# one request builds the file and the other 9 wait for it, instead of 10 builds.
+_export_build_locks = {"xlsx": threading.Lock(), "pdf": threading.Lock()}
+
+
+def _cached_export(db: Session, version: int | None, kind: str) -> bytes:
+    """
+    Build the export file once per items version.
+    The version is only the cache key; on a miss we read the rows with `db`,
+    give its connection back, then a worker process turns them into the file.
+    No version (None) = we can't tell if data changed, so always build fresh.
+    """
+    if version is None:
+        rows = crud.get_items_for_export(db)
         db.close()
+        return _build_in_worker(kind, rows)
 
+    cached = _export_cache.get(kind)
+    if cached is not None and cached[0] == version:
+        return cached[1]
 
-@router.get("/reports", response_class=HTMLResponse)
-def reports_page():
-    # Simple HTML (we keep it super simple)
-    return """
-    <html>
-      <head><title>Reports</title></head>
-      <body style="font-family: Arial; padding: 24px;">
-        <h2>Reports</h2>
-        <p>Download Inventory exports:</p>
-        <ul>
-          <li><a href="/export/items.xlsx">Download Excel (XLSX)</a></li>
-          <li><a href="/export/items.pdf">Download PDF (A4)</a></li>
-        </ul>
-        <p><a href="/">Back to Dashboard</a></p>
-      </body>
-    </html>
+    with _export_build_locks[kind]:
+        # Maybe another request built it while we waited for the lock
+        cached = _export_cache.get(kind)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        rows = crud.get_items_for_export(db)
+        db.close()  # don't keep a DB connection while the worker builds
+        content = _build_in_worker(kind, rows)
+        _export_cache[kind] = (version, content)
+        return content
+
+
+def export_response(request: Request, db: Session, kind: str, media_type: str, filename: str) -> Response:
+    """
+    Send the "xlsx" or "pdf" export, rebuilt only if the items changed.
+    If the browser sends the ETag of the current file, answer 304 (nothing to download).
     """
+    version = crud.get_items_version(db)
+    # Give the connection back now: we may wait for a build below, and the pool is small
+    # (a cache miss borrows one again just to read the rows)
+    db.close()
+    if version is None:
+        # No version to compare against: the browser must not reuse the file
+        headers = {"Cache-Control": "no-store"}
+    else:
+        # Same data -> same ETag in every server process
+        etag = f'"items-{kind}-v{version}"'
+        # no-cache = the browser may keep the file, but must ask us (cheaply) before reusing it
+        headers = {"Cache-Control": "no-cache", "ETag": etag}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = content_disposition(filename)
+    return Response(content=_cached_export(db, version, kind), media_type=media_type, headers=headers)
+
+
+@router.get("/reports", response_class=HTMLResponse)
+def reports_page(request: Request):
+    # Browser already has this exact page? Tell it to reuse its copy.
+    if request.headers.get("if-none-match") == REPORTS_ETAG:
+        return Response(status_code=304, headers=REPORTS_CACHE_HEADERS)
+    return HTMLResponse(REPORTS_HTML, headers=REPORTS_CACHE_HEADERS)
 
 
 @router.get("/export/items.xlsx")
-def export_items_xlsx(db: Session = Depends(get_db)):
-    items = crud.get_items(db)
-    payload = [
-        {"id": i.id, "name": i.name, "sku": i.sku, "qty": i.qty, "price": float(i.price) if i.price is not None else None}
-        for i in items
-    ]
-
-    content = items_to_xlsx_bytes(payload)
-    filename = make_export_filename("inventory_items", "xlsx")
-
-    return StreamingResponse(
-        iter([content]),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+@router.get("/exports/items.xlsx", include_in_schema=False)  # old URL, used by the dashboard
+def export_items_xlsx(request: Request, db: Session = Depends(get_db)):
+    return export_response(
+        request,
+        db,
+        "xlsx",
+        media_type=XLSX_MEDIA_TYPE,
+        filename=make_export_filename("inventory_items", "xlsx"),
     )
 
 
 @router.get("/export/items.pdf")
-def export_items_pdf(db: Session = Depends(get_db)):
-    items = crud.get_items(db)
-    payload = [
-        {"id": i.id, "name": i.name, "sku": i.sku, "qty": i.qty, "price": float(i.price) if i.price is not None else None}
-        for i in items
-    ]
-
-    content = items_to_pdf_bytes(payload)
-    filename = make_export_filename("inventory_items_A4", "pdf")
-
-    return StreamingResponse(
-        iter([content]),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+@router.get("/exports/items.pdf", include_in_schema=False)  # old URL, used by the dashboard
+def export_items_pdf(request: Request, db: Session = Depends(get_db)):
+    return export_response(
+        request,
+        db,
+        "pdf",
+        media_type=PDF_MEDIA_TYPE,
+        filename=make_export_filename("inventory_items_A4", "pdf"),
     )
@@ -3,21 +3,47 @@
 Export helpers (Excel + PDF)
 
 Beginner notes:
-- We generate the file in memory (BytesIO)
-- Then FastAPI streams it to the browser as a download
+- Each builder writes the whole file into memory (BytesIO) and returns its bytes
+- export_routes.py runs the builders in a worker process, caches the bytes and
+  sends them to the browser in one response
 """
 
 from __future__ import annotations
 
-from io import BytesIO
 from datetime import datetime
+from io import BytesIO
+from itertools import accumulate
+from typing import Iterable, Sequence
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment
+from openpyxl.utils import get_column_letter
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.pdfgen.canvas import Canvas
+
+# Content types of the downloads (also used by the gzip settings in main.py)
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+PDF_MEDIA_TYPE = "application/pdf"
+
+# Excel layout: built once at import, reused by every export
+XLSX_HEADERS = ("ID", "Name", "SKU", "Qty", "Price", "Total Value")
+XLSX_MAX_WIDTH = 40  # very long names wrap the view, so stop widening here
+HEADER_FONT = Font(bold=True)
+HEADER_ALIGN = Alignment(horizontal="center")
+
+# PDF layout (points). We draw the table ourselves, row by row, so every
+# size is fixed up front and nothing has to be measured or re-laid out.
+PDF_HEADERS = ("ID", "Name", "SKU", "Qty", "Price")
+PDF_COL_WIDTHS = (30, 160, 110, 45, 60)
+PDF_MARGIN = 24
+PDF_HEADER_ROW_H = 18
+PDF_ROW_H = 17
+PDF_CELL_PAD = 6
+PDF_HEADER_BG = colors.HexColor("#0f172a")  # dark header
+PDF_ROW_BGS = (colors.whitesmoke, colors.white)
+PDF_GRID_COLOR = colors.lightgrey
 
 
 def make_export_filename(prefix: str, ext: str) -> str:
@@ -25,96 +51,148 @@ def make_export_filename(prefix: str, ext: str) -> str:
     Create a clean filename like:
     inventory_items_2026-01-29_1730.xlsx
     """
-    stamp = datetime.now().strftime("%Y-%m-%d_%H%M")
-    return f"{prefix}_{stamp}.{ext}"
+    now = datetime.now()
+    return f"{prefix}_{now:%Y-%m-%d_%H%M}.{ext}"
+
 
+def content_disposition(filename: str) -> str:
+    """Header value that makes the browser download the file under this name."""
+    return f'attachment; filename="{filename}"'
 
-def items_to_xlsx_bytes(items: list[dict]) -> bytes:
+
+def items_to_xlsx_bytes(rows: Sequence[tuple]) -> bytes:
     """
-    Create an .xlsx file in memory.
-    items is a list of dicts like:
-    {"id":1,"name":"Oil Filter","sku":"TOY-...","qty":10,"price":12.5}
+    Create an .xlsx file and return its bytes.
+    rows is a list of tuples (e.g. SQL rows) like:
+    (1, "Oil Filter", "TOY-...", 10, 12.5, 125.0)  ->  id, name, sku, qty, price, value
+    (a list, not a one-shot iterator: it is read twice, once to size the columns)
+
+    write_only=True means openpyxl writes each row out as XML and forgets the cell
+    objects, so only the (zipped) file itself grows with the number of rows.
+    With lxml installed (see requirements.txt) openpyxl uses its faster C XML writer.
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Inventory"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Inventory")
 
-    headers = ["ID", "Name", "SKU", "Qty", "Price", "Total Value"]
-    ws.append(headers)
+    # Make it readable: columns as wide as their content
+    # (write-only sheets need the widths before any row is written)
+    for i, w in enumerate(_xlsx_column_widths(rows), start=1):
+        ws.column_dimensions[get_column_letter(i)].width = w
 
-    # Style header row
-    header_font = Font(bold=True)
-    for col in range(1, len(headers) + 1):
-        cell = ws.cell(row=1, column=col)
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
+    # Styled header row
+    header_row = []
+    for h in XLSX_HEADERS:
+        cell = WriteOnlyCell(ws, value=h)
+        cell.font = HEADER_FONT
+        cell.alignment = HEADER_ALIGN
+        header_row.append(cell)
+    ws.append(header_row)
 
-    # Add data rows
-    for it in items:
-        price = it.get("price")
-        qty = it.get("qty") or 0
-        total = (qty * price) if (price is not None) else None
+    # Add data rows (already in column order, "Total Value" comes from the SQL query)
+    for row in rows:
+        ws.append(row)
 
-        ws.append([it.get("id"), it.get("name"), it.get("sku"), qty, price, total])
+    out = BytesIO()
+    wb.save(out)
+    return out.getvalue()
 
-    # Make it readable: column widths
-    widths = [8, 28, 20, 10, 12, 14]
-    for i, w in enumerate(widths, start=1):
-        ws.column_dimensions[chr(64 + i)].width = w
 
-    # Save to bytes
-    bio = BytesIO()
-    wb.save(bio)
-    return bio.getvalue()
+def items_to_pdf_bytes(rows: Iterable[tuple]) -> bytes:
+    """
+    Create a simple A4 PDF report using ReportLab and return its bytes.
+    rows: same (id, name, sku, qty, price, value) tuples as items_to_xlsx_bytes
+    (the PDF has no value column, so it is skipped).
+
+    We draw straight on the canvas with a "y cursor" moving down the page:
+    one pass over the rows, a new page when the cursor reaches the bottom.
+    """
+    out = BytesIO()
+    page_w, page_h = A4
+    c = Canvas(out, pagesize=A4, pageCompression=1)  # compress page content (much smaller file)
+    c.setTitle("Inventory Report (A4)")
+
+    # Table is centered; col_x = left edge of each column + right edge of the table
+    table_w = sum(PDF_COL_WIDTHS)
+    x0 = (page_w - table_w) / 2
+    col_x = list(accumulate(PDF_COL_WIDTHS, initial=x0))
+
+    # Title + date (first page only)
+    y = page_h - PDF_MARGIN
+    c.setFont("Helvetica-Bold", 18)
+    c.drawCentredString(page_w / 2, y - 18, "Inventory Report (A4)")
+    c.setFont("Helvetica", 10)
+    c.drawString(PDF_MARGIN, y - 40, f"{datetime.now():%Y-%m-%d %H:%M}")
+    y -= 58
+
+    row_ys = _draw_pdf_header(c, col_x, y)
+    for n, (item_id, name, sku, qty, price, _value) in enumerate(rows):
+        y = row_ys[-1]
+        if y - PDF_ROW_H < PDF_MARGIN:
+            # Page is full: close the grid, start a new page with the header again
+            _draw_pdf_grid(c, col_x, row_ys)
+            c.showPage()
+            row_ys = _draw_pdf_header(c, col_x, page_h - PDF_MARGIN)
+            y = row_ys[-1]
+
+        c.setFillColor(PDF_ROW_BGS[n % 2])
+        c.rect(x0, y - PDF_ROW_H, table_w, PDF_ROW_H, stroke=0, fill=1)
+
+        c.setFillColor(colors.black)
+        text_y = y - PDF_ROW_H + 5
+        values = (str(item_id), name, sku, str(qty), "" if price is None else f"{price:.2f}")
+        for x, text in zip(col_x, values):
+            c.drawString(x + PDF_CELL_PAD, text_y, text)
+
+        row_ys.append(y - PDF_ROW_H)
+
+    _draw_pdf_grid(c, col_x, row_ys)
+    c.save()
+
+    return out.getvalue()
+
+
+def build_export_bytes(kind: str, rows: list[tuple]) -> bytes:
+    """
+    Build a whole "xlsx" or "pdf" export and return it as bytes.
+    Top-level function with plain arguments, so it can run in a worker process.
+    """
+    builder = items_to_xlsx_bytes if kind == "xlsx" else items_to_pdf_bytes
+    return builder(rows)
 
 
-def items_to_pdf_bytes(items: list[dict]) -> bytes:
+def _xlsx_column_widths(rows: Iterable[tuple]) -> list[int]:
     """
-    Create a simple A4 PDF report using ReportLab.
+    One pass over the rows: remember the longest text of every column
+    (header included), then add a little padding, capped at XLSX_MAX_WIDTH.
     """
-    bio = BytesIO()
-
-    doc = SimpleDocTemplate(
-        bio,
-        pagesize=A4,
-        leftMargin=24,
-        rightMargin=24,
-        topMargin=24,
-        bottomMargin=24,
-    )
-
-    styles = getSampleStyleSheet()
-    story = []
-
-    story.append(Paragraph("Inventory Report (A4)", styles["Title"]))
-    story.append(Paragraph(datetime.now().strftime("%Y-%m-%d %H:%M"), styles["Normal"]))
-    story.append(Spacer(1, 12))
-
-    data = [["ID", "Name", "SKU", "Qty", "Price"]]
-    for it in items:
-        data.append([
-            str(it.get("id", "")),
-            str(it.get("name", "")),
-            str(it.get("sku", "")),
-            str(it.get("qty", "")),
-            "" if it.get("price") is None else f"{it.get('price'):.2f}",
-        ])
-
-    table = Table(data, repeatRows=1)
-
-    table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0f172a")),  # dark header
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 10),
-
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
-        ("FONTSIZE", (0, 1), (-1, -1), 9),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
-    ]))
-
-    story.append(table)
-    doc.build(story)
-
-    return bio.getvalue()
+    max_len = [len(h) for h in XLSX_HEADERS]
+    for row in rows:
+        for i, val in enumerate(row):
+            if val is not None:
+                max_len[i] = max(max_len[i], len(str(val)))
+    return [min(n + 2, XLSX_MAX_WIDTH) for n in max_len]
+
+
+def _draw_pdf_header(c: Canvas, col_x: list[float], top: float) -> list[float]:
+    """
+    Draw the dark header row at `top`.
+    Returns the y of every row line so far (the grid is drawn when the page ends).
+    """
+    bottom = top - PDF_HEADER_ROW_H
+    c.setFillColor(PDF_HEADER_BG)
+    c.rect(col_x[0], bottom, col_x[-1] - col_x[0], PDF_HEADER_ROW_H, stroke=0, fill=1)
+
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 10)
+    for x, text in zip(col_x, PDF_HEADERS):
+        c.drawString(x + PDF_CELL_PAD, bottom + 5, text)
+
+    # Body rows use this font until the next page header
+    c.setFont("Helvetica", 9)
+    return [top, bottom]
+
+
+def _draw_pdf_grid(c: Canvas, col_x: list[float], row_ys: list[float]) -> None:
+    c.setStrokeColor(PDF_GRID_COLOR)
+    c.setLineWidth(0.5)
+    c.grid(col_x, row_ys)
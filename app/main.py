@@ -4,37 +4,77 @@ BEGINNER-FRIENDLY MAIN FILE (FastAPI)
 
 What this file does:
 1) Creates the FastAPI app
-2) Creates DB tables on startup (SQLite/Postgres)
+2) Creates DB tables on startup (SQLite/Postgres), unless CREATE_DB=0
 3) Serves a clean HTML dashboard (English UI only)
-4) Provides CRUD APIs for Items
-5) Provides Excel + PDF (A4) export endpoints
+4) Provides CRUD APIs for Items (async: they wait for the DB without holding a thread)
+5) Plugs in the Excel + PDF (A4) export endpoints (export_routes.py)
 
 Tip:
 - "API" is for machines (Swagger /docs)
 - "Dashboard" is for humans (browser UI)
 """
 
+import os
+from contextlib import asynccontextmanager
 from typing import List, Optional
 
+import anyio
 from fastapi import FastAPI, Depends, Request, HTTPException
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
 
 # Local project imports
-from .db import SessionLocal, engine, Base
-from . import schemas, crud
-
-# If you already have export_utils, we use it.
-# If you don't, comment these 2 lines and tell me, I’ll paste a self-contained exporter.
-from .export_utils import items_to_xlsx_bytes, items_to_pdf_bytes, make_export_filename
+from .db import engine, Base, get_async_db
+from . import models, schemas, crud, export_routes
+from .export_utils import PDF_MEDIA_TYPE, XLSX_MEDIA_TYPE
 
 
 # ----------------------------
-# 1) Create the app
+# 1) Startup / shutdown + create the app
 # ----------------------------
-app = FastAPI(title="Inventory Mini", version="0.2.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Code before `yield` runs once when the server starts, code after it when it stops.
+
+    Creates DB tables if they do not exist.
+    Set CREATE_DB=0 to skip this (e.g. tables are managed by migrations, or you run
+    several workers and only one of them should touch the schema).
+    The small items_version table + triggers (used to cache exports) are still
+    added if missing; see models.ItemsVersion for schemas managed by migrations.
+
+    Plain `def` routes (exports, reports, health) run in a thread pool of 40 threads
+    by default. A few slow exports could fill it and make the other `def` routes wait,
+    so we allow more threads (THREAD_LIMIT, default 200).
+
+    The worker processes that build Excel/PDF exports live as long as the app.
+    """
+    if os.getenv("CREATE_DB", "1") == "1":
+        Base.metadata.create_all(bind=engine)
+    # Not switched off by CREATE_DB=0: exports need it, and it only adds what is missing
+    models.ensure_items_version(engine)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = int(os.getenv("THREAD_LIMIT", "200"))
+    export_routes.start_export_workers()
+    try:
+        yield
+    finally:
+        export_routes.stop_export_workers()
+
+
+app = FastAPI(title="Inventory Mini", version="0.2.0", lifespan=lifespan)
+
+# Gzip responses bigger than 1 KB (JSON lists, HTML pages).
+# XLSX (a zip file) and our PDFs (compressed by ReportLab) are already compressed,
+# so gzipping them again would only burn CPU.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=1024,
+    exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + (XLSX_MEDIA_TYPE, PDF_MEDIA_TYPE),
+)
 
 
 # ----------------------------
@@ -43,40 +83,23 @@ app = FastAPI(title="Inventory Mini", version="0.2.0")
 # This lets your templates load: /static/css/app.css and /static/js/app.js
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
+# Reports page + Excel/PDF downloads live in export_routes.py
+app.include_router(export_routes.router)
+
 # Templates folder (HTML)
 templates = Jinja2Templates(directory="app/templates")
 
+# Compile the dashboard template ONCE at startup and stop re-checking the file
+# on every render (after editing a template, restart the server to see it).
+templates.env.auto_reload = False
+INDEX_TEMPLATE = templates.get_template("index.html")
 
-# ----------------------------
-# 3) DB session dependency
-# ----------------------------
-def get_db():
-    """
-    Creates a DB session per request, then closes it.
-    Why?
-    - If you don't close sessions, connections pile up and your app gets slow/broken.
-    """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-# ----------------------------
-# 4) Create tables on startup
-# ----------------------------
-@app.on_event("startup")
-def on_startup():
-    """
-    Runs once when the server starts.
-    Creates DB tables if they do not exist.
-    """
-    Base.metadata.create_all(bind=engine)
+# How many items the dashboard table shows (the KPI cards still count everything)
+DASHBOARD_ITEMS_LIMIT = 200
 
 
 # ----------------------------
-# 5) Health check (for Render)
+# 3) Health check (for Render)
 # ----------------------------
 @app.get("/health")
 def health():
@@ -84,142 +107,88 @@ def health():
 
 
 # ----------------------------
-# 6) Dashboard page (English UI)
+# 4) Dashboard page (English UI)
 # ----------------------------
 @app.get("/", response_class=HTMLResponse)
-def home(request: Request, db: Session = Depends(get_db)):
+async def home(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Renders the dashboard HTML.
     We pass "items" to the template so the page loads instantly (no endless LOADING).
     """
-    items = crud.get_items(db)
-    # Simple stats for cards
-    total_rows = len(items)
-    total_qty = sum([int(getattr(i, "qty", 0) or 0) for i in items])
-    total_value = sum(
-        [
-            (float(getattr(i, "price", 0) or 0) * float(getattr(i, "qty", 0) or 0))
-            for i in items
-        ]
-    )
-
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "items": items,
-            "total_rows": total_rows,
-            "total_qty": total_qty,
-            "total_value": total_value,
-        },
+    # Only the newest rows are shown in the table preview
+    items = await crud.get_items(db, limit=DASHBOARD_ITEMS_LIMIT)
+    # Stats for cards are computed by the DB (COUNT/SUM), not by a Python loop
+    total_rows, total_qty, total_value = await crud.get_item_stats(db)
+
+    return HTMLResponse(
+        INDEX_TEMPLATE.render(
+            request=request,
+            items=items,
+            total_rows=total_rows,
+            total_qty=total_qty,
+            total_value=total_value,
+        )
     )
 
 
 # ----------------------------
-# 7) API: List items
+# 5) API: List items
 # ----------------------------
 @app.get("/items", response_model=List[schemas.ItemOut])
-def list_items(db: Session = Depends(get_db)):
-    return crud.get_items(db)
+async def list_items(db: AsyncSession = Depends(get_async_db)):
+    return await crud.get_items(db)
 
 
 # ----------------------------
-# 8) API: Create item
+# 6) API: Create item
 # ----------------------------
 @app.post("/items", response_model=schemas.ItemOut)
-def add_item(item: schemas.ItemCreate, db: Session = Depends(get_db)):
-    return crud.create_item(db=db, item=item)
+async def add_item(item: schemas.ItemCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud.create_item(db=db, item=item)
+
+
+# ----------------------------
+# 6b) API: Create many items at once (imports/seeding)
+# ----------------------------
+@app.post("/items/bulk")
+async def add_items_bulk(items: List[schemas.ItemCreate], db: AsyncSession = Depends(get_async_db)):
+    created = await crud.create_items_bulk(db=db, items=items)
+    return {"created": created}
 
 
 # ----------------------------
-# 9) API: Get one item (optional)
+# 7) API: Get one item (optional)
 # ----------------------------
 @app.get("/items/{item_id}", response_model=schemas.ItemOut)
-def get_one_item(item_id: int, db: Session = Depends(get_db)):
-    obj = crud.get_item(db, item_id)
+async def get_one_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    obj = await crud.get_item(db, item_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Item not found")
     return obj
 
 
 # ----------------------------
-# 10) API: Update item
+# 8) API: Update item
 # ----------------------------
 @app.put("/items/{item_id}", response_model=schemas.ItemOut)
-def update_item(item_id: int, item: schemas.ItemCreate, db: Session = Depends(get_db)):
+async def update_item(item_id: int, item: schemas.ItemCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Beginner shortcut:
     - We reuse ItemCreate schema for update.
     - Later you can make a separate ItemUpdate schema (optional fields).
     """
-    obj = crud.update_item(db, item_id=item_id, item=item)
+    obj = await crud.update_item(db, item_id=item_id, patch=item)
     if not obj:
         raise HTTPException(status_code=404, detail="Item not found")
     return obj
 
 
 # ----------------------------
-# 11) API: Delete item
+# 9) API: Delete item
 # ----------------------------
 @app.delete("/items/{item_id}")
-def delete_item(item_id: int, db: Session = Depends(get_db)):
-    ok = crud.delete_item(db, item_id=item_id)
+async def delete_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    ok = await crud.delete_item(db, item_id=item_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Item not found")
     return {"ok": True}
-
-
-# ----------------------------
-# 12) Exports: Excel + PDF (A4)
-# ----------------------------
-@app.get("/exports/items.xlsx")
-def export_items_excel(db: Session = Depends(get_db)):
-    items = crud.get_items(db)
-
-    # Convert ORM objects into simple dicts (safe for export)
-    rows = []
-    for i in items:
-        rows.append(
-            {
-                "id": getattr(i, "id", None),
-                "name": getattr(i, "name", ""),
-                "sku": getattr(i, "sku", ""),
-                "qty": getattr(i, "qty", 0),
-                "price": getattr(i, "price", None),
-            }
-        )
-
-    data = items_to_xlsx_bytes(rows)
-    filename = make_export_filename(prefix="items", ext="xlsx")
-
-    return StreamingResponse(
-        iter([data]),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
-
-
-@app.get("/exports/items.pdf")
-def export_items_pdf(db: Session = Depends(get_db)):
-    items = crud.get_items(db)
-
-    rows = []
-    for i in items:
-        rows.append(
-            {
-                "id": getattr(i, "id", None),
-                "name": getattr(i, "name", ""),
-                "sku": getattr(i, "sku", ""),
-                "qty": getattr(i, "qty", 0),
-                "price": getattr(i, "price", None),
-            }
-        )
-
-    data = items_to_pdf_bytes(rows, page_size="A4")
-    filename = make_export_filename(prefix="items", ext="pdf")
-
-    return StreamingResponse(
-        iter([data]),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
@@ -9,18 +9,26 @@ Beginner notes:
 
 from __future__ import annotations
 
-from sqlalchemy import Column, Integer, String, Numeric
+import logging
+
+from sqlalchemy import Column, Engine, Integer, String, Numeric
+from sqlalchemy.exc import SQLAlchemyError
 from .db import Base
 
+logger = logging.getLogger(__name__)
+
 
 class Item(Base):
     __tablename__ = "items"
 
     # Primary key (auto increment)
-    id = Column(Integer, primary_key=True, index=True)
+    # No index=True: the primary key is already indexed, a 2nd index only slows writes
+    id = Column(Integer, primary_key=True)
 
     # Basic fields
     name = Column(String(200), nullable=False)
+    # index=True -> ix_items_sku, so lookups by SKU don't scan the table.
+    # Not unique: existing data has several rows with the same SKU.
     sku = Column(String(100), nullable=False, index=True)
 
     # qty = quantity in stock (integer)
@@ -29,3 +37,77 @@ class Item(Base):
     # price = optional (Decimal money)
     price = Column(Numeric(10, 2), nullable=True)
 
+
+class ItemsVersion(Base):
+    """
+    One row (id=1) with a number that goes up every time the items table changes.
+    Exports use it to know if their cached file is still current.
+
+    The database itself bumps it (triggers below), so changes made by other
+    server processes, admin scripts or migrations are seen too.
+
+    The app sets this up at every start (ensure_items_version), even with
+    CREATE_DB=0. If migrations own your schema and the app may not run DDL,
+    put the table + the ITEMS_VERSION_DDL statements in a migration instead.
+    Without them, exports still work, just without caching.
+    """
+    __tablename__ = "items_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# SQL run at startup: the version row + triggers that bump it.
+# Every statement is safe to run again, so an existing database
+# (e.g. an old inventory.db) just gets whatever is missing.
+# Other databases get no triggers (and no version): exports are then not cached.
+ITEMS_VERSION_DDL = {
+    # SQLite triggers run once per changed row (a statement that changes nothing bumps nothing)
+    "sqlite": [
+        "INSERT OR IGNORE INTO items_version (id, version) VALUES (1, 0)",
+        *(
+            f"CREATE TRIGGER IF NOT EXISTS items_version_after_{op.lower()} AFTER {op} ON items "
+            "BEGIN UPDATE items_version SET version = version + 1 WHERE id = 1; END"
+            for op in ("INSERT", "UPDATE", "DELETE")
+        ),
+    ],
+    # Postgres: once per statement, and only if it changed rows (Postgres 10+)
+    "postgresql": [
+        "INSERT INTO items_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING",
+        """
+        CREATE OR REPLACE FUNCTION bump_items_version() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE items_version SET version = version + 1
+            WHERE id = 1 AND EXISTS (SELECT 1 FROM changed_rows);
+            RETURN NULL;
+        END $$
+        """,
+        *(
+            stmt
+            for op, rows in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD"))
+            for stmt in (
+                f"DROP TRIGGER IF EXISTS items_version_after_{op.lower()} ON items",
+                f"CREATE TRIGGER items_version_after_{op.lower()} AFTER {op} ON items "
+                f"REFERENCING {rows} TABLE AS changed_rows "
+                "FOR EACH STATEMENT EXECUTE FUNCTION bump_items_version()",
+            )
+        ),
+    ],
+}
+
+
+def ensure_items_version(engine: Engine) -> bool:
+    """
+    Create the items_version table, its row and the triggers if they are missing.
+    Returns False (and logs a warning) if that failed, e.g. the items table
+    does not exist yet or the DB user may not run DDL; the app still starts.
+    """
+    try:
+        with engine.begin() as conn:
+            ItemsVersion.__table__.create(conn, checkfirst=True)
+            for sql in ITEMS_VERSION_DDL.get(conn.dialect.name, ()):
+                conn.exec_driver_sql(sql)
+    except SQLAlchemyError as exc:
+        logger.warning("Could not set up items_version, exports will not be cached: %s", exc)
+        return False
+    return True
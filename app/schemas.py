@@ -9,15 +9,20 @@ Beginner notes:
 
 from __future__ import annotations
 
-from typing import Optional
-from pydantic import BaseModel, ConfigDict, Field
+from decimal import Decimal
+from typing import Annotated, Optional
+from pydantic import BaseModel, ConfigDict, Field, PlainSerializer
+
+# Money: Decimal inside Python (same type the Numeric DB column gives us,
+# so no float <-> Decimal conversions), but still a plain number in JSON.
+Money = Annotated[Decimal, PlainSerializer(float, return_type=float, when_used="json")]
 
 
 class ItemBase(BaseModel):
     name: str = Field(..., examples=["Oil Filter"])
     sku: str = Field(..., examples=["TOY-OF-90915"])
     qty: int = Field(0, ge=0, examples=[10])
-    price: Optional[float] = Field(None, ge=0, examples=[12.50])
+    price: Optional[Money] = Field(None, ge=0, examples=[12.50])
 
 
 class ItemCreate(ItemBase):
@@ -30,7 +35,7 @@ class ItemUpdate(BaseModel):
     name: Optional[str] = None
     sku: Optional[str] = None
     qty: Optional[int] = Field(None, ge=0)
-    price: Optional[float] = Field(None, ge=0)
+    price: Optional[Money] = Field(None, ge=0)
 
 
 class ItemOut(ItemBase):
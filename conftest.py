@@ -0,0 +1,33 @@
+# conftest.py
+"""
+Shared test setup (pytest loads this file automatically).
+
+Beginner notes:
+- Being in the project root, this file also lets plain `pytest` import `app`
+- The app reads DATABASE_URL when it is first imported, so tests get the app
+  ONLY through the `app` fixture below, never with a top-level `import app...`
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The FastAPI app, using a throw-away SQLite file that is deleted afterwards."""
+    db_dir = tempfile.mkdtemp(prefix="inventory-tests-")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("DATABASE_URL", f"sqlite:///{db_dir}/test.db")
+        mp.chdir(os.path.dirname(__file__))  # templates/static are found relative to the root
+
+        from app.db import async_engine, engine
+        from app.main import app as fastapi_app
+
+        yield fastapi_app
+
+        engine.dispose()  # close the SQLite file before deleting it
+        async_engine.sync_engine.dispose()
+    shutil.rmtree(db_dir, ignore_errors=True)
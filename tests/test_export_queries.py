@@ -0,0 +1,66 @@
+# tests/test_export_queries.py
+"""
+How many SQL statements does an export run?
+
+Beginner notes:
+- The `app` fixture (conftest.py) runs the app on a throw-away SQLite file
+- A "before_cursor_execute" listener sees every SQL statement sent to the DB
+- Run with:  pytest -q
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+
+@pytest.fixture(scope="module")
+def client(app):
+    with TestClient(app) as c:  # "with" runs the lifespan (tables + export workers)
+        items = [{"name": f"Item {i}", "sku": f"SKU-{i}", "qty": i, "price": 1.5} for i in range(100)]
+        assert c.post("/items/bulk", json=items).json() == {"created": 100}
+        yield c
+
+
+@pytest.fixture
+def statements(app):
+    """List that collects every SQL statement run while the test is going."""
+    from app.db import async_engine, engine
+
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    engines = (engine, async_engine.sync_engine)
+    for e in engines:
+        event.listen(e, "before_cursor_execute", record)
+    yield seen
+    for e in engines:
+        event.remove(e, "before_cursor_execute", record)
+
+
+@pytest.mark.parametrize("url", ["/export/items.xlsx", "/export/items.pdf"])
+def test_export_of_100_items_runs_two_statements(client, statements, url):
+    from app import export_routes
+
+    export_routes._export_cache.clear()
+
+    r = client.get(url)
+
+    assert r.status_code == 200
+    # 1) SELECT version FROM items_version  2) SELECT id, name, ... FROM items
+    assert len(statements) == 2, statements
+    assert "items_version" in statements[0]
+    assert "FROM items ORDER BY" in statements[1]
+
+
+def test_cached_export_and_304_run_one_statement(client, statements):
+    etag = client.get("/export/items.xlsx").headers["etag"]  # build (or reuse) the file
+    statements.clear()
+
+    assert client.get("/export/items.xlsx").status_code == 200  # served from the cache
+    assert client.get("/export/items.xlsx", headers={"If-None-Match": etag}).status_code == 304
+
+    # Only the version check each time, the rows are not read again
+    assert len(statements) == 2, statements
+    assert all("items_version" in s for s in statements)